@@ -0,0 +1,149 @@
+#in-process LRU caches main.py keeps in front of the sprite/audio reads, one for the small
+#metadata documents (limited by how many it holds) and one for the bytes (limited by how many
+#bytes it holds), every method is synchronous so a get or put never yields to another request
+#in the middle and no lock is needed on the event loop
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+#how many invalidated keys a cache remembers for the reads that are still running
+MAX_TRACKED_INVALIDATIONS = 10000
+
+class LRUCache:
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_item_bytes: Optional[int] = None, size_of: Callable[[Any], int] = lambda value: 1,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        #values bigger than this are never cached, so one big file can not push out everything else
+        self.max_item_bytes = max_item_bytes
+        self.size_of = size_of
+        #seconds a value is kept for, None keeps it until it is evicted or invalidated
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        #goes up on every invalidation, a value read from the database before its key was
+        #invalidated may already be stale so it is not put in the cache (see token), only the
+        #key that was written is checked so writes to other keys never stop a value being cached
+        self._clock = 0
+        #key -> the clock when it was last invalidated, oldest first, at most MAX_TRACKED_INVALIDATIONS
+        self._invalidated = OrderedDict()
+        #tokens older than this are refused, set by clear and when an invalidation is no longer tracked
+        self._floor = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    #taken before reading a value from the database and handed to put with the value
+    def token(self) -> int:
+        return self._clock
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, token: Optional[int] = None):
+        if token is not None and (token < self._floor or self._invalidated.get(key, 0) > token):
+            return
+        size = self.size_of(value)
+        if self.max_item_bytes is not None and size > self.max_item_bytes:
+            return
+        self._drop(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self.bytes += size
+        #the least recently used values go first until the cache is back under its limits
+        while self._entries and ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                                 or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted[1]
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._clock += 1
+        self._invalidated[key] = self._clock
+        self._invalidated.move_to_end(key)
+        #forgetting an old invalidation refuses every token taken before it instead
+        while len(self._invalidated) > MAX_TRACKED_INVALIDATIONS:
+            _, self._floor = self._invalidated.popitem(last=False)
+        self._drop(key)
+
+    def clear(self):
+        self._clock += 1
+        self._floor = self._clock
+        self._invalidated.clear()
+        self._entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
+
+#lets concurrent reads of the same key share one call, the first caller runs it and the
+#others wait for its result, so a burst of requests for one id costs one database read
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        #how many callers got the result of a call another caller made
+        self.shared = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                #the first caller went away before its call finished, so this one makes the call
+                if future.cancelled():
+                    return await self.do(key, function)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            #mark the exception as seen in case no other caller was waiting for it
+            future.exception()
+            raise
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        future.set_result(result)
+        return result
+
+    #callers that come after this start a new call, used when the value was just written
+    #so a read that started before the write is not shared with them
+    def forget(self, key: Hashable):
+        self._calls.pop(key, None)
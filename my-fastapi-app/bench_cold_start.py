@@ -0,0 +1,107 @@
+#measures how long a cold start of main.py takes, from the first import to the first response,
+#each run is a new python process so nothing is already imported or connected
+#
+#run it from this folder with 'python bench_cold_start.py --runs 20', '--path' picks the request
+#(the default one reads the database), '--mode server' times the normal startup instead of the
+#serverless one, MONGODBSTRING has to be set to the cluster to time it against
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+#sends one GET straight to the ASGI app, like the platform does, and returns its status code
+async def asgi_get(app, path: str) -> int:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80)
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+#one cold start, runs in its own process and prints its timings as json
+def child(path: str, mode: str):
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async def run():
+        #the server mode sets everything up in lifespan before the first request
+        async with main.app.router.lifespan_context(main.app):
+            status = await asgi_get(main.app, path)
+            first = time.perf_counter()
+            warm_status = await asgi_get(main.app, path)
+            return status, first, warm_status, time.perf_counter()
+
+    if mode == "server":
+        status, first, warm_status, warm = asyncio.run(run())
+    else:
+        status = asyncio.run(asgi_get(main.app, path))
+        first = time.perf_counter()
+        #the platform may run a warm invocation on a new event loop, so the warm request gets its own
+        warm_status = asyncio.run(asgi_get(main.app, path))
+        warm = time.perf_counter()
+    print(json.dumps({
+        "status": status,
+        "warm_status": warm_status,
+        "import_ms": (imported - start) * 1000,
+        "first_response_ms": (first - start) * 1000,
+        "warm_response_ms": (warm - first) * 1000
+    }))
+
+def print_result(name: str, values: list):
+    values = sorted(values)
+    p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+    print(f"  {name:<18} median {statistics.median(values):>8.1f} ms   p99 {p99:>8.1f} ms   max {values[-1]:>8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time import-to-first-response of main.py")
+    parser.add_argument("--runs", type=int, default=10, help="how many cold starts to time")
+    parser.add_argument("--path", default="/player_score?limit=1", help="the request sent after the import")
+    parser.add_argument("--mode", choices=["serverless", "server"], default="serverless", help="the DEPLOYMENT_MODE to start in")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path, args.mode)
+        return
+
+    env = {**os.environ, "DEPLOYMENT_MODE": args.mode}
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--path", args.path, "--mode", args.mode],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    statuses = sorted({result["status"] for result in results} | {result["warm_status"] for result in results})
+    print(f"{args.mode} mode, GET {args.path}, {args.runs} cold starts (status {', '.join(map(str, statuses))})")
+    print_result("import", [result["import_ms"] for result in results])
+    print_result("first response", [result["first_response_ms"] for result in results])
+    print_result("warm response", [result["warm_response_ms"] for result in results])
+
+if __name__ == "__main__":
+    main()
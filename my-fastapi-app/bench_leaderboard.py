@@ -0,0 +1,98 @@
+#compares the in-process leaderboard (leaderboard.py) with the Mongo-only queries main.py
+#uses for top-N, rank and "around me" reads
+#
+#run it from this folder with 'python bench_leaderboard.py --rows 100000', add
+#'--mongo "<connection string>"' to also time the Mongo queries, they run against a
+#scratch "leaderboard_bench" database that is dropped at the end
+import argparse
+import asyncio
+import random
+import time
+
+import motor.motor_asyncio
+from bson.objectid import ObjectId
+
+from leaderboard import Leaderboard
+
+LEADERBOARD_SORT = [("score", -1), ("_id", 1)]
+LEADERBOARD_INDEX = LEADERBOARD_SORT + [("player_name", 1)]
+
+#runs the function for every id and returns the average time per call in microseconds
+async def time_per_call(function, ids) -> float:
+    start = time.perf_counter()
+    for score_id in ids:
+        result = function(score_id)
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter() - start) / len(ids) * 1_000_000
+
+def print_result(name: str, micros: float):
+    print(f"  {name:<10} {micros:>12.1f} us/op")
+
+async def bench_memory(rows: list, sample: list, limit: int):
+    start = time.perf_counter()
+    board = Leaderboard()
+    for row in rows:
+        board.upsert(row["_id"], row["player_name"], row["score"])
+    print(f"memory (loaded {len(rows)} rows in {time.perf_counter() - start:.2f}s)")
+
+    print_result("top", await time_per_call(lambda _: board.top(limit), sample))
+    print_result("rank", await time_per_call(board.rank, sample))
+    print_result("around", await time_per_call(lambda score_id: board.around(score_id, 5, 5), sample))
+
+    #a write moves a score to a new place, like update_score does
+    print_result("update", await time_per_call(lambda score_id: board.upsert(score_id, "bench", random.randint(0, 1_000_000)), sample))
+
+async def bench_mongo(uri: str, rows: list, sample: list, limit: int):
+    client = motor.motor_asyncio.AsyncIOMotorClient(uri)
+    scores = client.leaderboard_bench.scores
+    try:
+        await scores.drop()
+        for start in range(0, len(rows), 10_000):
+            await scores.insert_many(rows[start:start + 10_000], ordered=False)
+        await scores.create_index(LEADERBOARD_INDEX, name="leaderboard")
+        print(f"mongo ({len(rows)} rows)")
+
+        scores_by_id = {row["_id"]: row["score"] for row in rows}
+
+        async def top(_):
+            await scores.find({}, projection={"player_name": 1, "score": 1}).sort(LEADERBOARD_SORT).limit(limit).to_list(length=limit)
+
+        async def rank(score_id):
+            score = (await scores.find_one({"_id": score_id}, projection={"score": 1}))["score"]
+            await scores.count_documents({"$or": [{"score": {"$gt": score}}, {"score": score, "_id": {"$lt": score_id}}]})
+
+        async def around(score_id):
+            score = scores_by_id[score_id]
+            await rank(score_id)
+            await scores.find({"$or": [{"score": {"$gt": score}}, {"score": score, "_id": {"$lt": score_id}}]}).sort([("score", 1), ("_id", -1)]).limit(5).to_list(length=5)
+            await scores.find({"$or": [{"score": {"$lt": score}}, {"score": score, "_id": {"$gt": score_id}}]}).sort(LEADERBOARD_SORT).limit(5).to_list(length=5)
+
+        async def update(score_id):
+            await scores.update_one({"_id": score_id}, {"$set": {"score": random.randint(0, 1_000_000)}})
+
+        print_result("top", await time_per_call(top, sample))
+        print_result("rank", await time_per_call(rank, sample))
+        print_result("around", await time_per_call(around, sample))
+        print_result("update", await time_per_call(update, sample))
+    finally:
+        await client.drop_database("leaderboard_bench")
+        client.close()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-process leaderboard against Mongo queries")
+    parser.add_argument("--rows", type=int, default=100_000, help="how many scores to load")
+    parser.add_argument("--samples", type=int, default=1_000, help="how many reads of each kind to time")
+    parser.add_argument("--limit", type=int, default=10, help="size of the top-N")
+    parser.add_argument("--mongo", help="connection string of a database to also time the Mongo queries on")
+    args = parser.parse_args()
+
+    rows = [{"_id": ObjectId(), "player_name": f"player{i}", "score": random.randint(0, 1_000_000)} for i in range(args.rows)]
+    sample = [row["_id"] for row in random.sample(rows, min(args.samples, len(rows)))]
+
+    await bench_memory(rows, sample, args.limit)
+    if args.mongo:
+        await bench_mongo(args.mongo, rows, sample, args.limit)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+#replays of POSTs sent with an "Idempotency-Key" header, the response of the first request with a
+#key is kept in a TTL-indexed collection (and a small LRU in front of it) so a client that retries
+#gets the same response back without the score/sprite being written again
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+MAX_KEY_LENGTH = 255
+
+#mongo gives datetimes back without a timezone, they are always UTC
+def _as_utc(at: datetime) -> datetime:
+    return at if at.tzinfo is not None else at.replace(tzinfo=timezone.utc)
+
+class IdempotencyStore:
+    def __init__(self, collection: Callable, ttl: timedelta, lease: timedelta, cache_size: int):
+        #the collection is looked up on every call, like in repository.py
+        self._collection = collection
+        #how long a response is replayed for
+        self.ttl = ttl
+        #how long a claim lasts without being renewed, a running request renews it every third of
+        #that, so a claim only runs out when its worker died and another worker may take it over
+        self.lease = lease
+        self.cache_size = cache_size
+        #key -> (fingerprint, response, expires_at) of finished requests, least recently used first
+        self._cache = OrderedDict()
+        #key -> (fingerprint, future) of requests running in this process
+        self._in_flight = {}
+
+    @property
+    def collection(self):
+        return self._collection()
+
+    def _cached(self, key_id: str) -> Optional[tuple]:
+        entry = self._cache.get(key_id)
+        if entry is None:
+            return None
+        if entry[2] <= datetime.now(timezone.utc):
+            del self._cache[key_id]
+            return None
+        self._cache.move_to_end(key_id)
+        return entry
+
+    def _remember(self, key_id: str, fingerprint: str, response: dict, expires_at: datetime):
+        self._cache[key_id] = (fingerprint, response, expires_at)
+        self._cache.move_to_end(key_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _check_fingerprint(expected: str, fingerprint: str):
+        if expected != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+
+    #runs handler once per scope and key and returns its response, later requests with the same key
+    #get that response back, requests with the same key that come in while it runs wait for it
+    async def run(self, scope: str, key: str, fingerprint: str, handler: Callable[[], Awaitable[dict]]) -> dict:
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+        key_id = f"{scope}:{key}"
+
+        cached = self._cached(key_id)
+        if cached is not None:
+            self._check_fingerprint(cached[0], fingerprint)
+            return cached[1]
+
+        #the same key is already running in this process, so wait for its response
+        in_flight = self._in_flight.get(key_id)
+        if in_flight is not None:
+            self._check_fingerprint(in_flight[0], fingerprint)
+            future = in_flight[1]
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                #the first request was cancelled before it finished, so this one runs it instead
+                if future.cancelled():
+                    return await self.run(scope, key, fingerprint, handler)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key_id] = (fingerprint, future)
+        try:
+            response = await self._run_once(key_id, fingerprint, handler)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            #mark the exception as seen in case no duplicate was waiting for it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key_id]
+        future.set_result(response)
+        return response
+
+    #keeps pushing the claim's expiry out while the handler runs, so a slow handler never loses its
+    #key to the TTL index or to another worker, stops when the claim is no longer this worker's
+    async def _renew(self, key_id: str, owner: ObjectId):
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            result = await self.collection.update_one(
+                {"_id": key_id, "status": "pending", "owner": owner},
+                {"$set": {"expires_at": datetime.now(timezone.utc) + self.lease}}
+            )
+            if not result.matched_count:
+                return
+
+    async def _run_once(self, key_id: str, fingerprint: str, handler: Callable[[], Awaitable[dict]]) -> dict:
+        #every claim is marked with who made it, so only that worker renews, releases or finishes it
+        owner = ObjectId()
+
+        #claim the key, a claim that is already there is either a finished request or one still running
+        while True:
+            now = datetime.now(timezone.utc)
+            try:
+                await self.collection.insert_one({"_id": key_id, "fingerprint": fingerprint, "status": "pending", "owner": owner, "expires_at": now + self.lease})
+                break
+            except DuplicateKeyError:
+                doc = await self.collection.find_one({"_id": key_id})
+            #the claim was released or expired in the meantime, so try to claim it again
+            if doc is None:
+                continue
+            self._check_fingerprint(doc["fingerprint"], fingerprint)
+            if doc["status"] == "done":
+                self._remember(key_id, fingerprint, doc["response"], _as_utc(doc["expires_at"]))
+                return doc["response"]
+            if _as_utc(doc["expires_at"]) > now:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            #the worker that claimed the key stopped renewing it, take it over unless another worker just did
+            result = await self.collection.update_one(
+                {"_id": key_id, "status": "pending", "expires_at": doc["expires_at"]},
+                {"$set": {"owner": owner, "expires_at": now + self.lease}}
+            )
+            if result.modified_count:
+                break
+
+        renewal = asyncio.create_task(self._renew(key_id, owner))
+        try:
+            response = await handler()
+        except BaseException:
+            #nothing was recorded, so the client can retry with the same key
+            await self.collection.delete_one({"_id": key_id, "status": "pending", "owner": owner})
+            raise
+        finally:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+
+        #the response is stored even if the TTL index removed the claim, but not over a claim another
+        #worker has taken over, that worker stores its own response
+        expires_at = datetime.now(timezone.utc) + self.ttl
+        try:
+            await self.collection.update_one(
+                {"_id": key_id, "owner": owner},
+                {"$set": {"fingerprint": fingerprint, "status": "done", "response": response, "expires_at": expires_at}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return response
+        self._remember(key_id, fingerprint, response, expires_at)
+        return response
@@ -0,0 +1,165 @@
+#in-process leaderboard kept in the same order as the "leaderboard" index on db.scores
+#(highest score first, earliest _id wins a tie), main.py loads it from Mongo at startup
+#and updates it on every score write so top-N, rank and "around me" reads never leave
+#the process
+import random
+from typing import List, Optional
+
+from bson.objectid import ObjectId
+
+#enough levels for far more scores than will ever fit in memory
+MAX_LEVEL = 32
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        #next[i] is the following node on level i, width[i] is how many places forward it is
+        self.next = [None] * level
+        self.width = [1] * level
+
+#a skip list that also keeps how many places each link skips over, so finding the
+#position of a key or the key at a position is O(log n) like inserting and removing
+class IndexableSkipList:
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVEL)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    #each level up holds about half of the nodes of the level below
+    @staticmethod
+    def _random_level() -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        chain = [None] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        new_level = self._random_level()
+        new_node = _Node(key, new_level)
+        steps = 0
+        for level in range(new_level):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        #links above the new node now skip over one more place
+        for level in range(new_level, MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * MAX_LEVEL
+        node = self.head
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        #links above the removed node now skip over one place less
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    #the 0 based position of the key, or None if it is not in the list
+    def index(self, key) -> Optional[int]:
+        node = self.head
+        position = -1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        node = node.next[0]
+        if node is None or node.key != key:
+            return None
+        return position + 1
+
+    #yields up to count keys starting at the 0 based position start
+    def slice(self, start: int, count: int):
+        if start >= self.size or count <= 0:
+            return
+        node = self.head
+        position = -1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and position + node.width[level] <= start:
+                position += node.width[level]
+                node = node.next[level]
+        while node is not None and count > 0:
+            yield node.key
+            node = node.next[0]
+            count -= 1
+
+#the scores of the leaderboard in leaderboard order, the skip list holds (-score, _id)
+#so ascending key order is the leaderboard order, the dict holds the name and score by _id
+class Leaderboard:
+    def __init__(self):
+        self._order = IndexableSkipList()
+        self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    #adds a score or moves it to its new place if it is already on the leaderboard
+    def upsert(self, score_id: ObjectId, player_name: str, score: int):
+        old = self._entries.get(score_id)
+        if old is not None:
+            if old[1] == score:
+                self._entries[score_id] = (player_name, score)
+                return
+            self._order.remove((-old[1], score_id))
+        self._entries[score_id] = (player_name, score)
+        self._order.insert((-score, score_id))
+
+    #removes a score, returns False if it was not on the leaderboard
+    def remove(self, score_id: ObjectId) -> bool:
+        old = self._entries.pop(score_id, None)
+        if old is None:
+            return False
+        self._order.remove((-old[1], score_id))
+        return True
+
+    def _entry(self, key, rank: int) -> dict:
+        player_name, score = self._entries[key[1]]
+        return {"id": str(key[1]), "player_name": player_name, "score": score, "rank": rank}
+
+    #the highest limit scores, highest first
+    def top(self, limit: int) -> List[dict]:
+        return [self._entry(key, rank) for rank, key in enumerate(self._order.slice(0, limit), start=1)]
+
+    #the 1 based place of the score, or None if it is not on the leaderboard
+    def rank(self, score_id: ObjectId) -> Optional[int]:
+        entry = self._entries.get(score_id)
+        if entry is None:
+            return None
+        return self._order.index((-entry[1], score_id)) + 1
+
+    #the scores just ahead of and just behind a score, including the score itself
+    def around(self, score_id: ObjectId, before: int, after: int) -> Optional[List[dict]]:
+        rank = self.rank(score_id)
+        if rank is None:
+            return None
+        start = max(rank - 1 - before, 0)
+        keys = self._order.slice(start, rank - start + after)
+        return [self._entry(key, position) for position, key in enumerate(keys, start=start + 1)]
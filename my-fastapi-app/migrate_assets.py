@@ -0,0 +1,57 @@
+#one-off migration that moves the bytes of old sprite/audio documents out of their "content"
+#field and into the GridFS buckets, so every document in db.sprites / db.audio is just the
+#small metadata document that points to its blob with "blob_id"
+#
+#run it from this folder with 'python migrate_assets.py', it is safe to run more than once
+import asyncio
+import io
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+import main
+from main import store_asset_blob, delete_asset_content, SPRITE_BUCKET_NAME, AUDIO_BUCKET_NAME
+
+#moves the inline content of every document in the collection into the bucket
+async def migrate_collection(collection, bucket_name: str, default_content_type: str) -> int:
+    migrated = 0
+
+    #only the ids are listed so the bytes of the whole collection are never loaded at once
+    ids = [doc["_id"] async for doc in collection.find({"content": {"$exists": True}}, projection={"_id": 1})]
+    for asset_id in ids:
+        doc = await collection.find_one({"_id": asset_id, "content": {"$exists": True}})
+        #the document was changed or removed since the ids were listed
+        if not doc:
+            continue
+
+        content_type = doc.get("content_type", default_content_type)
+        file = UploadFile(io.BytesIO(doc["content"]), filename=doc.get("filename"), headers=Headers({"content-type": content_type}))
+        stored_content = await store_asset_blob(bucket_name, file, doc.get("filename"))
+
+        #only replace the content if it is still the one that was just copied
+        result = await collection.update_one(
+            {"_id": asset_id, "content": doc["content"]},
+            {"$set": stored_content, "$unset": {"content": ""}}
+        )
+        if result.modified_count:
+            migrated += 1
+        else:
+            #the document changed in the meantime, so give back the reference that was taken
+            await delete_asset_content(bucket_name, stored_content)
+
+    return migrated
+
+async def run():
+    #the same connection settings as the app
+    await main.connect_mongo()
+    try:
+        sprites = await migrate_collection(main.db.sprites, SPRITE_BUCKET_NAME, "image/png")
+        print(f"Moved {sprites} sprites into {SPRITE_BUCKET_NAME}")
+
+        audio = await migrate_collection(main.db.audio, AUDIO_BUCKET_NAME, "audio/mpeg")
+        print(f"Moved {audio} audio files into {AUDIO_BUCKET_NAME}")
+    finally:
+        main.close_mongo()
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,41 @@
+#the writes main.py makes to the sprites, audio and scores collections, each mutation is one
+#find_one_and_* round trip that gives back the document as it was before (only the projected
+#fields, so never the bytes of a sprite/audio), which tells "not found" apart from "changed"
+#without a find_one first
+from typing import Callable, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+class Repository:
+    def __init__(self, collection: Callable, projection: dict):
+        #the collection is looked up on every call, the scores collection depends on SCORE_MODE
+        self._collection = collection
+        self.projection = projection
+
+    @property
+    def collection(self):
+        return self._collection()
+
+    #sets (and unsets) the fields and returns the document as it was before, None if it does not exist
+    async def update(self, doc_id: ObjectId, set_fields: dict, unset_fields: Optional[List[str]] = None) -> Optional[dict]:
+        update = {"$set": set_fields}
+        if unset_fields:
+            update["$unset"] = {field: "" for field in unset_fields}
+        return await self.collection.find_one_and_update(
+            {"_id": doc_id},
+            update,
+            projection=self.projection,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    #deletes the document and returns it as it was, None if it does not exist
+    async def delete(self, doc_id: ObjectId) -> Optional[dict]:
+        return await self.collection.find_one_and_delete({"_id": doc_id}, projection=self.projection)
+
+    #whether an update changed anything, only the projected fields can be compared
+    def changed(self, before: dict, set_fields: dict, unset_fields: Optional[List[str]] = None) -> bool:
+        for field, value in set_fields.items():
+            if field in self.projection and before.get(field) != value:
+                return True
+        return any(field in before for field in unset_fields or [])
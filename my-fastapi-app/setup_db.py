@@ -0,0 +1,26 @@
+#one-off setup of the database the app runs against, it creates the indexes and builds the score
+#stats with one pass over the leaderboard collection, a serverless deployment does neither on its
+#own (a request can not create indexes or scan every score) and refuses requests until this has run
+#
+#run it from this folder with 'python setup_db.py' before the first deploy and again whenever the
+#indexes change, it is safe to run more than once
+import asyncio
+
+import main
+
+async def run():
+    #the same connection settings as the app
+    await main.connect_mongo()
+    try:
+        await main.create_indexes()
+        print("Created the indexes")
+
+        if await main.load_score_stats():
+            print("Built the score stats from the leaderboard collection")
+        else:
+            print("The score stats are already built")
+    finally:
+        main.close_mongo()
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,186 @@
+#small, mergeable summaries of the score distribution, main.py keeps one up to date on every
+#score write and answers percentile and histogram questions from it without reading db.scores
+import math
+import random
+from typing import List, Optional
+
+#KLL quantile sketch, it keeps a few hundred of the values it has seen in levels of compactors
+#where a value on level h stands for 2**h values, so its size does not grow with the data and
+#two sketches can be merged by joining their levels
+class KLLSketch:
+    def __init__(self, k: int = 200, c: float = 2 / 3):
+        self.k = k
+        self.c = c
+        self.compactors = []
+        self.count = 0
+        self.max_size = 0
+        self._grow()
+
+    #the higher levels hold more values, the lowest ones shrink geometrically down to 2
+    def _capacity(self, height: int) -> int:
+        depth = len(self.compactors) - height - 1
+        return max(int(math.ceil(self.k * self.c ** depth)), 2)
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(height) for height in range(len(self.compactors)))
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.compactors)
+
+    #sorts the first full level and moves every other value one level up, where it counts double
+    def _compress(self):
+        for height, items in enumerate(self.compactors):
+            if len(items) < self._capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self._grow()
+            items.sort()
+            #an odd value out stays on this level so no weight is lost
+            leftover = [items.pop()] if len(items) % 2 else []
+            self.compactors[height + 1].extend(items[random.randint(0, 1)::2])
+            self.compactors[height] = leftover
+            return
+
+    def add(self, value: float):
+        self.compactors[0].append(value)
+        self.count += 1
+        while self._size() >= self.max_size:
+            self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, items in enumerate(other.compactors):
+            self.compactors[height].extend(items)
+        self.count += other.count
+        while self._size() >= self.max_size:
+            self._compress()
+
+    #the values kept in the sketch with the number of values each one stands for
+    def weighted_items(self) -> List[tuple]:
+        return [(value, 2 ** height) for height, items in enumerate(self.compactors) for value in items]
+
+    def to_doc(self) -> dict:
+        return {"k": self.k, "count": self.count, "compactors": [list(items) for items in self.compactors]}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "KLLSketch":
+        sketch = cls(k=doc.get("k", 200))
+        sketch.compactors = [list(items) for items in doc["compactors"]] or [[]]
+        sketch.count = doc["count"]
+        sketch.max_size = sum(sketch._capacity(height) for height in range(len(sketch.compactors)))
+        return sketch
+
+#counts of scores in equal width buckets from low upwards, with one count for the scores
+#below the first bucket and one for the scores past the last bucket
+class Histogram:
+    def __init__(self, low: int, width: int, buckets: int):
+        self.low = low
+        self.width = width
+        self.counts = [0] * buckets
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value: float, amount: int = 1):
+        if value < self.low:
+            self.underflow += amount
+            return
+        index = int((value - self.low) // self.width)
+        if index >= len(self.counts):
+            self.overflow += amount
+        else:
+            self.counts[index] += amount
+
+    def merge(self, other: "Histogram"):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def to_doc(self) -> dict:
+        return {"low": self.low, "width": self.width, "counts": list(self.counts), "underflow": self.underflow, "overflow": self.overflow}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Histogram":
+        histogram = cls(doc["low"], doc["width"], len(doc["counts"]))
+        histogram.counts = list(doc["counts"])
+        histogram.underflow = doc["underflow"]
+        histogram.overflow = doc["overflow"]
+        return histogram
+
+#the distribution of the scores, sketches can not forget a value, so removed scores go into
+#their own sketch and are taken away from the added ones when a rank is worked out
+class ScoreStats:
+    def __init__(self, low: int, width: int, buckets: int, k: int = 200):
+        self.added = KLLSketch(k)
+        self.removed = KLLSketch(k)
+        self.histogram = Histogram(low, width, buckets)
+
+    @property
+    def count(self) -> int:
+        return self.added.count - self.removed.count
+
+    def add(self, score: float):
+        self.added.add(score)
+        self.histogram.add(score)
+
+    def remove(self, score: float):
+        self.removed.add(score)
+        self.histogram.add(score, -1)
+
+    def merge(self, other: "ScoreStats"):
+        self.added.merge(other.added)
+        self.removed.merge(other.removed)
+        self.histogram.merge(other.histogram)
+
+    #the values of the sketch in order with how many scores are at or below each of them
+    def _cumulative(self) -> List[tuple]:
+        weights = {}
+        for value, weight in self.added.weighted_items():
+            weights[value] = weights.get(value, 0) + weight
+        for value, weight in self.removed.weighted_items():
+            weights[value] = weights.get(value, 0) - weight
+        cumulative = []
+        running = 0
+        for value in sorted(weights):
+            running += weights[value]
+            cumulative.append((value, running))
+        return cumulative
+
+    #the percent of scores that are lower than the score
+    def percentile_of(self, score: float) -> Optional[float]:
+        if self.count <= 0:
+            return None
+        below = 0
+        for value, running in self._cumulative():
+            if value >= score:
+                break
+            below = running
+        return round(min(max(below / self.count, 0.0), 1.0) * 100, 2)
+
+    #the score that the fraction q (0 to 1) of the scores are at or below
+    def quantiles(self, fractions: List[float]) -> dict:
+        cumulative = self._cumulative()
+        results = {}
+        for fraction in fractions:
+            target = fraction * self.count
+            results[fraction] = None
+            for value, running in cumulative:
+                if running >= target:
+                    results[fraction] = value
+                    break
+            if results[fraction] is None and cumulative and self.count > 0:
+                results[fraction] = cumulative[-1][0]
+        return results
+
+    def to_doc(self) -> dict:
+        return {"added": self.added.to_doc(), "removed": self.removed.to_doc(), "histogram": self.histogram.to_doc()}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "ScoreStats":
+        histogram = Histogram.from_doc(doc["histogram"])
+        stats = cls(histogram.low, histogram.width, len(histogram.counts))
+        stats.added = KLLSketch.from_doc(doc["added"])
+        stats.removed = KLLSketch.from_doc(doc["removed"])
+        stats.histogram = histogram
+        return stats
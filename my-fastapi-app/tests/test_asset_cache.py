@@ -0,0 +1,45 @@
+import asset_cache
+from asset_cache import LRUCache
+
+def test_invalidating_a_key_refuses_only_reads_of_that_key():
+    cache = LRUCache(max_entries=10)
+    token = cache.token()
+    cache.invalidate("written")
+
+    cache.put("written", "stale", token)
+    cache.put("other", "fresh", token)
+
+    assert cache.get("written") is None
+    assert cache.get("other") == "fresh"
+
+def test_a_read_started_after_the_invalidation_is_cached():
+    cache = LRUCache(max_entries=10)
+    cache.invalidate("key")
+    token = cache.token()
+
+    cache.put("key", "fresh", token)
+
+    assert cache.get("key") == "fresh"
+
+def test_clear_refuses_every_earlier_read():
+    cache = LRUCache(max_entries=10)
+    token = cache.token()
+    cache.clear()
+
+    cache.put("key", "stale", token)
+
+    assert cache.get("key") is None
+
+def test_a_forgotten_invalidation_still_refuses_older_reads(monkeypatch):
+    monkeypatch.setattr(asset_cache, "MAX_TRACKED_INVALIDATIONS", 2)
+    cache = LRUCache(max_entries=10)
+    token = cache.token()
+    for key in ("a", "b", "c"):
+        cache.invalidate(key)
+
+    #"a" is no longer tracked, so every read from before it is refused
+    cache.put("a", "stale", token)
+    cache.put("untouched", "value", token)
+
+    assert cache.get("a") is None
+    assert cache.get("untouched") is None
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+from bson.objectid import ObjectId
+
+from leaderboard import IndexableSkipList, Leaderboard
+
+#the leaderboard worked out the slow way, sorted by highest score first and earliest id on a tie
+def reference_order(scores: dict) -> list:
+    return sorted(scores, key=lambda score_id: (-scores[score_id][1], score_id))
+
+def reference_entry(scores: dict, score_id: ObjectId, rank: int) -> dict:
+    player_name, score = scores[score_id]
+    return {"id": str(score_id), "player_name": player_name, "score": score, "rank": rank}
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_a_sorted_reference(seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    leaderboard = Leaderboard()
+    scores = {}
+    ids = [ObjectId() for _ in range(300)]
+
+    for step in range(3000):
+        score_id = rng.choice(ids)
+        if rng.random() < 0.25:
+            assert leaderboard.remove(score_id) == (score_id in scores)
+            scores.pop(score_id, None)
+        else:
+            #a small range of scores so there are plenty of ties
+            entry = (f"player{rng.randrange(50)}", rng.randrange(40))
+            leaderboard.upsert(score_id, *entry)
+            scores[score_id] = entry
+
+        if step % 100:
+            continue
+        order = reference_order(scores)
+        assert len(leaderboard) == len(order)
+        limit = rng.randrange(0, 60)
+        assert leaderboard.top(limit) == [reference_entry(scores, score_id, rank) for rank, score_id in enumerate(order[:limit], start=1)]
+        for rank, score_id in enumerate(order, start=1):
+            assert leaderboard.rank(score_id) == rank
+        for score_id in ids:
+            if score_id not in scores:
+                assert leaderboard.rank(score_id) is None
+                assert leaderboard.around(score_id, 2, 2) is None
+        if order:
+            position = rng.randrange(len(order))
+            before, after = rng.randrange(6), rng.randrange(6)
+            start = max(position - before, 0)
+            expected = [reference_entry(scores, score_id, rank)
+                        for rank, score_id in enumerate(order[start:position + after + 1], start=start + 1)]
+            assert leaderboard.around(order[position], before, after) == expected
+
+def test_skip_list_positions_and_slices():
+    random.seed(0)
+    skip_list = IndexableSkipList()
+    keys = []
+    rng = random.Random(1)
+    for _ in range(2000):
+        if keys and rng.random() < 0.4:
+            key = keys.pop(rng.randrange(len(keys)))
+            skip_list.remove(key)
+        else:
+            key = rng.random()
+            keys.append(key)
+            skip_list.insert(key)
+    keys.sort()
+
+    assert len(skip_list) == len(keys)
+    for position, key in enumerate(keys):
+        assert skip_list.index(key) == position
+    for start in (0, 1, len(keys) // 2, len(keys) - 1, len(keys)):
+        assert list(skip_list.slice(start, 25)) == keys[start:start + 25]
+    assert skip_list.index(-1.0) is None
+    with pytest.raises(KeyError):
+        skip_list.remove(-1.0)
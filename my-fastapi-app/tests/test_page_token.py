@@ -0,0 +1,14 @@
+import pytest
+from fastapi import HTTPException
+
+from main import decode_page_token, encode_page_token
+
+def test_round_trip():
+    assert decode_page_token(encode_page_token({"id": "65f0c0ffee0000000000abcd"})) == {"id": "65f0c0ffee0000000000abcd"}
+
+@pytest.mark.parametrize("token", ["MQ", "W10", "bnVsbA", "not base64!", ""])
+def test_anything_else_is_a_400(token):
+    with pytest.raises(HTTPException) as error:
+        decode_page_token(token)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid page token"
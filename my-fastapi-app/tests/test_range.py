@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from main import MAX_RANGES, UPLOAD_CHUNK_SIZE, iter_asset_multipart, iter_asset_range, multipart_byteranges, parse_range_header
+
+def assert_unsatisfiable(range_header: str, length: int):
+    with pytest.raises(HTTPException) as error:
+        parse_range_header(range_header, length)
+    assert error.value.status_code == 416
+    assert error.value.headers == {"Content-Range": f"bytes */{length}"}
+
+@pytest.mark.parametrize("range_header, ranges", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=990-5000", [(990, 999)]),
+    ("bytes=0-0,-1", [(0, 0), (999, 999)]),
+    (" bytes=1-2", None),
+])
+def test_byte_ranges(range_header, ranges):
+    assert parse_range_header(range_header, 1000) == ranges
+
+@pytest.mark.parametrize("range_header, ranges", [
+    ("bytes=-500", [(500, 999)]),
+    ("bytes=-1000", [(0, 999)]),
+    #a suffix longer than the file is the whole file
+    ("bytes=-5000", [(0, 999)]),
+])
+def test_suffix_ranges(range_header, ranges):
+    assert parse_range_header(range_header, 1000) == ranges
+
+@pytest.mark.parametrize("range_header", ["bytes=1000-", "bytes=1000-2000", "bytes=-0", "bytes=5000-,-0"])
+def test_unsatisfiable_ranges(range_header):
+    assert_unsatisfiable(range_header, 1000)
+
+def test_a_satisfiable_range_is_served_next_to_an_unsatisfiable_one():
+    assert parse_range_header("bytes=2000-,0-9", 1000) == [(0, 9)]
+
+@pytest.mark.parametrize("range_header", ["bytes=-5", "bytes=0-", "bytes=0-0", "bytes=-5,0-"])
+def test_every_range_of_an_empty_file_is_unsatisfiable(range_header):
+    assert_unsatisfiable(range_header, 0)
+
+@pytest.mark.parametrize("range_header", [
+    None, "", "items=0-10", "bytes=", "bytes=abc", "bytes=1", "bytes=5-1", "bytes=-", "bytes=1-2-3", "bytes=0-1,x-",
+])
+def test_malformed_headers_are_ignored(range_header):
+    assert parse_range_header(range_header, 1000) is None
+    assert parse_range_header(range_header, 0) is None
+
+def test_too_many_ranges_are_ignored():
+    at_limit = "bytes=" + ",".join(f"{n * 10}-{n * 10 + 1}" for n in range(MAX_RANGES))
+    over_limit = "bytes=" + ",".join(f"{n * 10}-{n * 10 + 1}" for n in range(MAX_RANGES + 1))
+    assert len(parse_range_header(at_limit, 1000)) == MAX_RANGES
+    assert parse_range_header(over_limit, 1000) is None
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+def test_range_of_inline_content_spans_chunks():
+    content = bytes(range(256)) * (UPLOAD_CHUNK_SIZE // 256 * 3)
+    start, end = UPLOAD_CHUNK_SIZE - 10, 2 * UPLOAD_CHUNK_SIZE + 10
+    assert asyncio.run(collect(iter_asset_range(None, content, start, end))) == content[start:end + 1]
+
+@pytest.mark.parametrize("ranges", [[(0, 0), (999, 999)], [(0, 99), (500, 999)], [(10, 19), (20, 29), (900, 950)]])
+def test_multipart_content_length_matches_the_body(ranges):
+    content = bytes(range(250)) * 4
+    boundary = "65f0c0ffee0000000000abcd"
+
+    parts, body_length = multipart_byteranges(ranges, len(content), "audio/mpeg", boundary)
+    body = asyncio.run(collect(iter_asset_multipart(None, content, parts, boundary)))
+
+    assert body_length == len(body)
+    for start, end in ranges:
+        assert f"Content-Range: bytes {start}-{end}/{len(content)}\r\n\r\n".encode() + content[start:end + 1] in body
+    assert body.endswith(f"\r\n--{boundary}--\r\n".encode())
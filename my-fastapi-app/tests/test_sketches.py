@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from sketches import Histogram, KLLSketch, ScoreStats
+
+#the sketches keep a random half of each compacted level, so every test seeds the module random
+@pytest.fixture(autouse=True)
+def seeded():
+    random.seed(1234)
+
+#the most any value's estimated rank is off by, as a fraction of the count
+def worst_rank_error(sketch: KLLSketch, count: int) -> float:
+    worst = 0
+    running = 0
+    #the values are 0 to count - 1, so the true rank of value v is v + 1
+    for value, weight in sorted(sketch.weighted_items()):
+        running += weight
+        worst = max(worst, abs(running - (value + 1)) / count)
+    return worst
+
+def shuffled(count: int, seed: int) -> list:
+    values = list(range(count))
+    random.Random(seed).shuffle(values)
+    return values
+
+def test_merge_keeps_every_value_counted_and_the_ranks_close():
+    values = shuffled(20000, seed=1)
+    first, second = KLLSketch(), KLLSketch()
+    for value in values[:7000]:
+        first.add(value)
+    for value in values[7000:]:
+        second.add(value)
+
+    first.merge(second)
+
+    assert first.count == len(values)
+    assert sum(weight for _, weight in first.weighted_items()) == len(values)
+    assert worst_rank_error(first, len(values)) <= 0.02
+    #the merged sketch stays a fixed size however many values it has seen
+    assert len(first.weighted_items()) < 1000
+
+def test_round_trip_through_a_document():
+    stats = ScoreStats(0, 100, 50)
+    for value in shuffled(5000, seed=2):
+        stats.add(value)
+    for value in range(0, 5000, 7):
+        stats.remove(value)
+
+    loaded = ScoreStats.from_doc(stats.to_doc())
+
+    assert loaded.to_doc() == stats.to_doc()
+    assert loaded.count == stats.count
+    assert loaded.quantiles([0.25, 0.5, 0.9]) == stats.quantiles([0.25, 0.5, 0.9])
+    assert loaded.percentile_of(2500) == stats.percentile_of(2500)
+
+    #a loaded sketch keeps working like the one it was saved from
+    for value in range(5000, 6000):
+        loaded.added.add(value)
+    assert loaded.added.count == 6000
+    assert sum(weight for _, weight in loaded.added.weighted_items()) == 6000
+
+def test_percentiles_after_removing_scores():
+    count = 20000
+    stats = ScoreStats(0, 1000, 20)
+    values = shuffled(count, seed=3)
+    for value in values:
+        stats.add(value)
+    #the lower half is removed, 10000 to 19999 are left
+    for value in values:
+        if value < count // 2:
+            stats.remove(value)
+
+    remaining = count // 2
+    assert stats.count == remaining
+    for fraction, value in stats.quantiles([0.1, 0.25, 0.5, 0.75, 0.9]).items():
+        assert abs(value - (remaining + fraction * remaining)) <= 0.04 * remaining
+    for score in (12000, 15000, 18000):
+        assert abs(stats.percentile_of(score) - (score - remaining) / remaining * 100) <= 4
+
+    #the histogram is exact, the removed half is taken out of its buckets
+    assert stats.histogram.counts == [0] * 10 + [1000] * 10
+
+def test_no_scores_left_has_no_percentile():
+    stats = ScoreStats(0, 10, 10)
+    stats.add(5)
+    stats.remove(5)
+    assert stats.count == 0
+    assert stats.percentile_of(5) is None
+
+def test_histogram_merge_and_out_of_range_scores():
+    first, second = Histogram(0, 10, 3), Histogram(0, 10, 3)
+    for value in (-1, 0, 9, 10, 29, 30):
+        first.add(value)
+    second.add(15)
+
+    first.merge(second)
+
+    assert (first.underflow, first.counts, first.overflow) == (1, [2, 2, 1], 1)
+    assert Histogram.from_doc(first.to_doc()).to_doc() == first.to_doc()